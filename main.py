@@ -1,15 +1,188 @@
 import os
 import sys
+import glob
+import hashlib
+import html
+import tempfile
+from functools import lru_cache
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QUrl, pyqtSignal
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget
 from PyQt6.QtWebEngineWidgets import QWebEngineView
+import numpy as np
 import pandas as pd
 import folium
 from folium import plugins
 from utils.config import DATA_PATHS
 
+# Heat points are binned to this many decimal degrees (0.1° ≈ 11 km) before
+# rendering; points in the same cell are summed into one weighted point
+HEATMAP_GRID_DECIMALS = 1
+
+# Colour stops for the heat layer; part of the render cache key
+HEATMAP_GRADIENT = {
+    0.2: 'blue',
+    0.4: 'cyan',
+    0.6: 'lime',
+    0.8: 'yellow',
+    1.0: 'red'
+}
+
+
+# Error maps are not cached renders, so the name must not match heatmap_*.html
+ERROR_MAP_FILE = 'error_map.html'
+
+
+def _heatmap_cache_dir():
+    """Return the directory holding rendered maps, creating it if needed."""
+    cache_dir = DATA_PATHS.get('cache', os.path.join(os.path.dirname(__file__), 'data', 'processed', '.cache'))
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _cached_heatmap_html(results_path):
+    """Return the cache file path for the heatmap rendered from ``results_path``.
+
+    The rendered map is a pure function of the results file and the render
+    settings, so the cache key is a hash of both. The predictor rewrites the
+    file on every run, but identical results give identical bytes and
+    therefore the same key.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    with open(results_path, 'rb') as fh:
+        digest.update(fh.read())
+    digest.update(repr((HEATMAP_GRID_DECIMALS, sorted(HEATMAP_GRADIENT.items()))).encode())
+    return os.path.join(_heatmap_cache_dir(), f"heatmap_{digest.hexdigest()}.html")
+
+
+def _write_html(path, text):
+    """Write ``text`` to ``path`` atomically, so a partial file is never seen.
+
+    When ``path`` is a cached heatmap, older renders are removed afterwards.
+    """
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as fh:
+        fh.write(text)
+    os.replace(fh.name, path)
+    if name.startswith('heatmap_'):
+        for stale in glob.glob(os.path.join(directory, 'heatmap_*.html')):
+            if os.path.basename(stale) != name:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+    return path
+
+
+_MESSAGE_PLACEHOLDER = '__MAP_MESSAGE__'
+
+
+@lru_cache(maxsize=None)
+def _message_map_template(icon):
+    """Render the US map with a single placeholder marker, once per icon."""
+    m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
+    folium.Marker(
+        location=[37.0902, -95.7129],
+        popup=_MESSAGE_PLACEHOLDER,
+        icon=folium.Icon(color='red', icon=icon)
+    ).add_to(m)
+    return m.get_root().render()
+
+
+def _render_message_map(message, icon, path):
+    """Write a map whose marker popup shows ``message`` to ``path`` and return it.
+
+    Reuses the pre-rendered template, so no Folium work happens per message.
+    The popup sits inside a JS template literal, so backticks and ``$`` are
+    escaped along with the HTML special characters.
+    """
+    text = html.escape(message).replace('`', '&#96;').replace('$', '&#36;')
+    return _write_html(path, _message_map_template(icon).replace(_MESSAGE_PLACEHOLDER, text))
+
+
+def _render_heatmap(results_path, error_path):
+    """Build the heatmap for ``results_path`` and return the path of the saved HTML.
+
+    Runs off the GUI thread, so it only touches files and never Qt widgets.
+    On failure an error map is written to ``error_path`` instead.
+    """
+    try:
+        # Reuse the previously rendered map if the results file hasn't changed
+        cache_path = _cached_heatmap_html(results_path)
+        if os.path.exists(cache_path):
+            return cache_path
+
+        # Load only the plotted columns; missing scores come back as NaN
+        data = pd.read_parquet(results_path, columns=['lat', 'lon', 'risk_score']).astype('float64')
+        
+        # Filter out rows with empty or NaN risk_score values
+        heatmap_data = data[['lat', 'lon', 'risk_score']].dropna()
+        
+        # Collapse nearby points onto a coarse grid so fewer points are serialized
+        heatmap_data = (
+            heatmap_data
+            .assign(
+                lat=heatmap_data['lat'].round(HEATMAP_GRID_DECIMALS),
+                lon=heatmap_data['lon'].round(HEATMAP_GRID_DECIMALS)
+            )
+            .groupby(['lat', 'lon'], as_index=False, sort=False)['risk_score']
+            .sum()
+        )
+        
+        if len(heatmap_data) == 0:
+            # No valid data - show empty map with message
+            return _render_message_map(
+                "No risk score data available. Please run the predictor to generate risk scores using IBM Time Series Forecasting.",
+                'info-sign',
+                cache_path
+            )
+
+        # Create map centered on US
+        m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
+
+        # Prepare heatmap data: [lat, lon, weight] rows as one contiguous array.
+        # HeatMap reads the rows directly, so skip the list-of-lists copy.
+        # float64 is kept because Folium's tojson can't serialize float32.
+        heatmap_values = heatmap_data[['lat', 'lon', 'risk_score']].to_numpy(dtype=np.float64)
+
+        # Add heatmap layer
+        plugins.HeatMap(
+            heatmap_values,
+            radius=15,
+            min_opacity=0.2,
+            max_zoom=18,
+            gradient=HEATMAP_GRADIENT
+        ).add_to(m)
+
+        # Write the map to disk and let QtWebEngine stream it from there;
+        # setHtml copies the whole page over IPC and is capped at ~2 MB
+        return _write_html(cache_path, m.get_root().render())
+    except Exception as e:
+        # Error loading data - show error message
+        return _render_message_map(f"Error loading heatmap data: {str(e)}", 'warning-sign', error_path)
+
+
+class HeatmapSignals(QObject):
+    finished = pyqtSignal(str)
+
+
+class HeatmapWorker(QRunnable):
+    """Reads the risk results and renders the Folium map on a pool thread."""
+
+    def __init__(self, results_path, error_path):
+        super().__init__()
+        self.results_path = results_path
+        self.error_path = error_path
+        self.signals = HeatmapSignals()
+
+    def run(self):
+        self.signals.finished.emit(_render_heatmap(self.results_path, self.error_path))
+
+
 class Dashboard(QWidget):
     def __init__(self):
         super().__init__()
+        self._worker = None
+        self._loaded = False
         self.initUI()
 
     def initUI(self):
@@ -17,63 +190,33 @@ class Dashboard(QWidget):
         self.vlayout.setContentsMargins(0, 0, 0, 0)
         self.vlayout.setSpacing(0)
         self.map_view = QWebEngineView()
-        self.load_heatmap()
         self.vlayout.addWidget(self.map_view)
         self.setLayout(self.vlayout)
 
+    def showEvent(self, event):
+        # Start loading the heatmap the first time the dashboard is shown; the
+        # zero-delay timer lets the empty widget paint before the work begins
+        super().showEvent(event)
+        if not self._loaded:
+            self._loaded = True
+            QTimer.singleShot(0, self.load_heatmap)
+
     def load_heatmap(self):
-        # Load data from CSV and create heatmap using Folium
-        base_dir = os.path.dirname(__file__)
-        csv_path = os.path.join(DATA_PATHS.get('processed', os.path.join(os.path.dirname(__file__), 'data', 'processed')), "regional_risk.csv")
-        
-        try:
-            data = pd.read_csv(csv_path)
-            
-            # Filter out rows with empty or NaN risk_score values
-            # Convert risk_score to numeric, coercing errors to NaN
-            data['risk_score'] = pd.to_numeric(data['risk_score'], errors='coerce')
-            heatmap_data = data[['lat', 'lon', 'risk_score']].dropna()
-            
-            if len(heatmap_data) == 0:
-                # No valid data - show empty map with message
-                m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
-                folium.Marker(
-                    location=[37.0902, -95.7129],
-                    popup="No risk score data available. Please run the predictor to generate risk scores using IBM Time Series Forecasting.",
-                    icon=folium.Icon(color='red', icon='info-sign')
-                ).add_to(m)
-            else:
-                # Create map centered on US
-                m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
-                
-                # Prepare heatmap data: [lat, lon, weight] format
-                heatmap_values = heatmap_data[['lat', 'lon', 'risk_score']].values.tolist()
-                
-                # Add heatmap layer
-                plugins.HeatMap(
-                    heatmap_values,
-                    radius=15,
-                    min_opacity=0.2,
-                    max_zoom=18,
-                    gradient={
-                        0.2: 'blue',
-                        0.4: 'cyan',
-                        0.6: 'lime',
-                        0.8: 'yellow',
-                        1.0: 'red'
-                    }
-                ).add_to(m)
-            
-            self.map_view.setHtml(m.get_root().render())
-        except Exception as e:
-            # Error loading data - show error message
-            m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
-            folium.Marker(
-                location=[37.0902, -95.7129],
-                popup=f"Error loading heatmap data: {str(e)}",
-                icon=folium.Icon(color='red', icon='warning-sign')
-            ).add_to(m)
-            self.map_view.setHtml(m.get_root().render())
+        # Load forecast results and create heatmap using Folium in the background
+        results_path = os.path.join(DATA_PATHS.get('processed', os.path.join(os.path.dirname(__file__), 'data', 'processed')), "regional_risk.parquet")
+        # Error maps go to one fixed file beside the cached renders, so failed
+        # loads don't leave a new temp file behind each time
+        error_path = os.path.join(_heatmap_cache_dir(), ERROR_MAP_FILE)
+
+        self.map_view.setHtml("<h3>Loading…</h3>")
+        # Keep a reference so the signals object outlives the pool's run()
+        self._worker = HeatmapWorker(results_path, error_path)
+        self._worker.signals.finished.connect(self._show_map)
+        QThreadPool.globalInstance().start(self._worker)
+
+    def _show_map(self, path):
+        """Display the rendered map file produced by the worker."""
+        self.map_view.setUrl(QUrl.fromLocalFile(path))
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -2,9 +2,19 @@
 Constants used across the prediction pipeline.
 """
 
+import numpy as np
+
 # Model configuration
 MIN_DATA_POINTS = 512  # Minimum required by GRANITE_TTM_512_96_R2 model
 FORECAST_FREQUENCY = "M"  # Monthly frequency
+FORECAST_MAX_WORKERS = 32  # Concurrent forecast requests in flight
+FORECAST_BATCH_SIZE = 50  # Counties sent together in one multi-series forecast request
+FORECAST_INPUT_SIGNIFICANT_DIGITS = 7  # float32 precision for values sent to the model
+FORECAST_FALLBACK_WORKERS = 8  # Concurrent per-county requests when a batched request fails
+FORECAST_MAX_RETRIES = 3  # Retries for throttled or transient forecast request failures
+FORECAST_RETRY_BACKOFF = 1.0  # Base delay in seconds, doubled on each retry
+FORECAST_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RESULT_FLOAT32_COLUMNS = ('lat', 'lon')  # Output columns saved at float32 precision (binned before plotting)
 
 # Risk index weights
 RISK_WEIGHTS = {
@@ -29,6 +39,10 @@ FIPS_TO_STATE = {
     '55': 'WI', '56': 'WY'
 }
 
+# Same mapping as an array indexed by integer FIPS code ('' for unassigned codes),
+# so whole columns can be translated with a single gather
+FIPS_TO_STATE_ARR = np.array([FIPS_TO_STATE.get(f"{code:02d}", '') for code in range(57)], dtype='<U2')
+
 # IAM token endpoint
 IAM_TOKEN_URL = "https://iam.cloud.ibm.com/identity/token"
 
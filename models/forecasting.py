@@ -2,16 +2,89 @@
 Forecasting functions for time series risk prediction.
 """
 
+import random
+import threading
+import time
+import httpx
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Tuple
 from ibm_watsonx_ai import APIClient
 from ibm_watsonx_ai.foundation_models import TSModelInference
 from ibm_watsonx_ai.foundation_models.schema import TSForecastParameters
+from ibm_watsonx_ai.wml_client_error import ApiRequestFailure
 from utils.config import API_KEY, PROJECT_ID
 from utils.geocode import get_county_coordinates
 from utils.logger import logger
-from models.constants import MIN_DATA_POINTS, FORECAST_FREQUENCY
+from models.constants import (
+    MIN_DATA_POINTS, FORECAST_FREQUENCY, FORECAST_MAX_WORKERS, FORECAST_BATCH_SIZE, FORECAST_INPUT_SIGNIFICANT_DIGITS,
+    FORECAST_FALLBACK_WORKERS, FORECAST_MAX_RETRIES, FORECAST_RETRY_BACKOFF, FORECAST_RETRY_STATUS_CODES
+)
+
+# Forecast parameters are identical for every county, so validate them once.
+# TSModelInference.forecast deep-copies params, so sharing across threads is safe.
+_FORECAST_PARAMS = TSForecastParameters(
+    timestamp_column="date",
+    freq=FORECAST_FREQUENCY,
+    target_columns=["risk_index"]
+)
+
+# Caps forecast requests in flight across the batch workers and their per-county
+# fallback pools, so fallbacks can't oversubscribe the client's connection pool
+_REQUEST_SLOTS = threading.BoundedSemaphore(FORECAST_MAX_WORKERS)
+
+# Multi-series variant: county/state identify each stacked series in one request
+_BATCH_FORECAST_PARAMS = TSForecastParameters(
+    timestamp_column="date",
+    freq=FORECAST_FREQUENCY,
+    target_columns=["risk_index"],
+    id_columns=["county", "state"]
+)
+
+
+@lru_cache(maxsize=256)
+def _padded_date_range(end_ns: int, periods: int) -> pd.DatetimeIndex:
+    """Return the padding date grid ending at ``end_ns``.
+
+    Counties sharing an earliest date share the same grid, so it is built once
+    and reused. DatetimeIndex is immutable, so sharing it is safe.
+    """
+    return pd.date_range(end=pd.Timestamp(end_ns), periods=periods, freq='M')
+
+
+def _pad_risk_values(dates: np.ndarray, values: np.ndarray, min_points: int) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """Pad a county's (dates, values) arrays onto a ``min_points`` monthly grid.
+
+    Works directly on numpy arrays so the per-county path avoids building
+    intermediate DataFrames. Returns the date grid and the filled values.
+    """
+    date_range = _padded_date_range(int(dates.min().astype('datetime64[ns]').astype(np.int64)), min_points)
+    
+    # Collapse duplicate dates (one row per cost-of-living family type) to
+    # their mean, then drop each onto its slot in the grid
+    unique_dates, inverse = np.unique(dates, return_inverse=True)
+    date_means = np.bincount(inverse, weights=values) / np.bincount(inverse)
+    slots = date_range.get_indexer(unique_dates)
+    on_grid = slots >= 0
+    risk = np.full(min_points, np.nan)
+    risk[slots[on_grid]] = date_means[on_grid]
+    
+    # Interpolate missing values in one compiled pass; np.interp holds the
+    # first/last known values flat beyond the ends, like ffill/bfill
+    has_value = ~np.isnan(risk)
+    if has_value.any():
+        positions = np.arange(min_points)
+        risk = np.interp(positions, positions[has_value], risk[has_value])
+    else:
+        # Fallback to mean if nothing landed on the grid
+        original_mean = values.mean() if len(values) else np.nan
+        if np.isnan(original_mean):
+            original_mean = 0.0
+        risk = np.full(min_points, original_mean, dtype='float64')
+    
+    return date_range, risk
 
 
 def augment_time_series(county_ts: pd.DataFrame, min_points: int) -> pd.DataFrame:
@@ -19,81 +92,62 @@ def augment_time_series(county_ts: pd.DataFrame, min_points: int) -> pd.DataFram
     if len(county_ts) >= min_points:
         return county_ts
     
-    earliest_date = county_ts['date'].min()
-    date_range = pd.date_range(
-        end=earliest_date,
-        periods=min_points,
-        freq='M'
-    )
-    
-    augmented_ts = pd.DataFrame({
-        'date': date_range,
-        'risk_index': np.nan
-    })
-    
-    county_ts_renamed = county_ts.rename(columns={'risk_index': 'risk_index_known'})
-    augmented_ts = augmented_ts.merge(
-        county_ts_renamed[['date', 'risk_index_known']],
-        on='date',
-        how='left'
-    )
-    
-    augmented_ts['risk_index'] = augmented_ts['risk_index_known'].fillna(augmented_ts['risk_index'])
-    augmented_ts = augmented_ts[['date', 'risk_index']]
-    augmented_ts = augmented_ts.sort_values('date').reset_index(drop=True)
-    
-    # Interpolate missing values
-    augmented_ts['risk_index'] = augmented_ts['risk_index'].interpolate(
-        method='linear', limit_direction='both', axis=0
+    date_range, risk = _pad_risk_values(
+        county_ts['date'].to_numpy(dtype='datetime64[ns]'),
+        county_ts['risk_index'].to_numpy(dtype='float64'),
+        min_points
     )
-    augmented_ts['risk_index'] = augmented_ts['risk_index'].ffill().bfill()
-    
-    # Fallback to mean if still NaN
-    if augmented_ts['risk_index'].isna().any():
-        original_mean = county_ts_renamed['risk_index_known'].mean()
-        if pd.isna(original_mean):
-            original_mean = 0.0
-        augmented_ts['risk_index'] = augmented_ts['risk_index'].fillna(original_mean)
-    
-    return augmented_ts
+    return pd.DataFrame({'date': date_range, 'risk_index': risk})
+
+
+def _round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    """Round ``values`` to ``digits`` significant digits.
+
+    The results are the nearest doubles to short decimals, so they serialize to
+    JSON without the trailing noise a float32 cast would print.
+    """
+    magnitude = np.abs(values)
+    exponent = np.floor(np.log10(magnitude, out=np.zeros_like(values), where=magnitude > 0))
+    scale = 10.0 ** (digits - 1 - exponent)
+    return np.round(values * scale) / scale
 
 
 def prepare_county_time_series(county_data: pd.DataFrame, min_points: int) -> Optional[pd.DataFrame]:
-    """Prepare and validate county time series data for forecasting."""
-    county_ts = county_data[['date', 'risk_index']].copy()
-    county_ts = county_ts.sort_values('date').reset_index(drop=True)
-    
-    # Remove NaN values
-    county_ts = county_ts.dropna(subset=['risk_index'])
-    
-    # Handle date conversion
-    if not pd.api.types.is_datetime64_any_dtype(county_ts['date']):
-        county_ts['date'] = pd.to_datetime(county_ts['date'], errors='coerce')
-    else:
-        county_ts = county_ts[county_ts['date'].notna()].copy()
-    
-    county_ts = county_ts.dropna(subset=['date'])
-    
-    if len(county_ts) == 0:
-        return None
-    
-    # Augment if needed
-    if len(county_ts) < min_points:
-        county_ts = augment_time_series(county_ts, min_points)
-    
-    # Truncate if too long
-    if len(county_ts) > min_points:
-        county_ts = county_ts.tail(min_points).reset_index(drop=True)
-    
-    # Final validation
-    if len(county_ts) < min_points:
+    """Prepare and validate county time series data for forecasting.
+
+    The series is cleaned, sorted, padded or truncated as plain numpy arrays,
+    and the DataFrame handed to the SDK is built once at the end.
+    """
+    dates = county_data['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    dates = dates.to_numpy(dtype='datetime64[ns]')
+    values = county_data['risk_index'].to_numpy(dtype='float64')
+    
+    # Order by date (same quicksort as sort_values, so same-date rows keep the
+    # order they always had), then remove rows with a missing value or date
+    order = np.argsort(dates, kind='quicksort')
+    dates, values = dates[order], values[order]
+    valid = ~(np.isnan(values) | np.isnat(dates))
+    dates, values = dates[valid], values[valid]
+    if len(values) == 0:
         return None
     
-    # Convert for JSON serialization
-    county_ts['date'] = county_ts['date'].dt.strftime('%Y-%m-%d')
-    county_ts['risk_index'] = county_ts['risk_index'].astype(float)
-    
-    return county_ts
+    if len(values) < min_points:
+        # Augment if needed
+        date_range, values = _pad_risk_values(dates, values, min_points)
+        dates = date_range.to_numpy()
+    elif len(values) > min_points:
+        # Truncate if too long
+        dates, values = dates[-min_points:], values[-min_points:]
+    
+    # Convert for JSON serialization; a day-precision numpy cast yields the
+    # same ISO 'YYYY-MM-DD' strings as strftime without per-element formatting.
+    # Values are sent at float32 precision, which roughly halves the payload.
+    return pd.DataFrame({
+        'date': dates.astype('datetime64[D]').astype(str).astype(object),
+        'risk_index': _round_significant(values, FORECAST_INPUT_SIGNIFICANT_DIGITS)
+    })
 
 
 def extract_forecast_value(forecast_result: Dict[str, Any], county: str, state: str) -> Optional[float]:
@@ -115,6 +169,77 @@ def extract_forecast_value(forecast_result: Dict[str, Any], county: str, state:
     return None
 
 
+def extract_batch_forecast_values(forecast_result: Dict[str, Any]) -> Dict[Tuple[str, str], float]:
+    """Extract the last forecasted value per (county, state) from a multi-series result."""
+    if not forecast_result or "results" not in forecast_result or len(forecast_result["results"]) == 0:
+        return {}
+    
+    forecast_df = pd.DataFrame(forecast_result["results"][0])
+    if 'county' not in forecast_df.columns or 'state' not in forecast_df.columns:
+        return {}
+    
+    if 'risk_index' in forecast_df.columns:
+        value_col = 'risk_index'
+    else:
+        # Try to find forecast column
+        forecast_cols = [col for col in forecast_df.columns if col not in ['date', 'timestamp', 'county', 'state']]
+        if not forecast_cols:
+            return {}
+        value_col = forecast_cols[0]
+    
+    last_values = forecast_df.groupby(['county', 'state'], sort=False)[value_col].last()
+    return last_values.to_dict()
+
+
+def _build_county_result(
+    county: str,
+    state: str,
+    county_data: pd.DataFrame,
+    forecasted_value: float,
+    idx: int
+) -> Dict[str, Any]:
+    """Combine a county's forecast with its latest actual value into an output row."""
+    # Get most recent actual value (county_data arrives sorted by date)
+    most_recent_actual = county_data['risk_index'].iat[-1]
+    
+    # Use maximum to avoid underestimating risk
+    predicted_risk = max(forecasted_value, most_recent_actual)
+    
+    if idx < 5:
+        logger.info(f"Forecast for {county}, {state}: forecasted={forecasted_value:.6f}, actual={most_recent_actual:.6f}, combined={predicted_risk:.6f}")
+    
+    # Get coordinates
+    lat, lon = get_county_coordinates(county, state)
+    
+    return {
+        'region': f"{county.title()}, {state}",
+        'county': county,
+        'state': state,
+        'risk_score': float(predicted_risk),
+        'lat': lat,
+        'lon': lon
+    }
+
+
+def _forecast_with_retry(ts_model: TSModelInference, data: pd.DataFrame, params: TSForecastParameters) -> Dict[str, Any]:
+    """Call ``ts_model.forecast``, backing off and retrying throttled or transient failures.
+
+    At most FORECAST_MAX_WORKERS calls are in flight at once, and no slot is
+    held while backing off. The backoff is jittered so workers throttled
+    together don't all retry at the same moment.
+    """
+    for attempt in range(FORECAST_MAX_RETRIES + 1):
+        try:
+            with _REQUEST_SLOTS:
+                return ts_model.forecast(data=data, params=params)
+        except (ApiRequestFailure, httpx.TransportError) as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            retryable = isinstance(e, httpx.TransportError) or status in FORECAST_RETRY_STATUS_CODES
+            if not retryable or attempt == FORECAST_MAX_RETRIES:
+                raise
+            time.sleep(FORECAST_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
 def forecast_single_county(
     county: str,
     state: str,
@@ -136,46 +261,69 @@ def forecast_single_county(
         logger.info(f"Processing {county}, {state}: {len(county_ts)} data points")
     
     try:
-        params = TSForecastParameters(
-            timestamp_column="date",
-            freq=FORECAST_FREQUENCY,
-            target_columns=["risk_index"]
-        )
-        
-        forecast_result = ts_model.forecast(data=county_ts, params=params)
+        forecast_result = _forecast_with_retry(ts_model, county_ts, _FORECAST_PARAMS)
         forecasted_value = extract_forecast_value(forecast_result, county, state)
         
         if forecasted_value is None:
             return None
         
-        # Get most recent actual value
-        original_data = county_data[['date', 'risk_index']].copy()
-        original_data = original_data.sort_values('date')
-        most_recent_actual = original_data['risk_index'].iloc[-1]
-        
-        # Use maximum to avoid underestimating risk
-        predicted_risk = max(forecasted_value, most_recent_actual)
-        
-        if idx < 5:
-            logger.info(f"Forecast for {county}, {state}: forecasted={forecasted_value:.6f}, actual={most_recent_actual:.6f}, combined={predicted_risk:.6f}")
-        
-        # Get coordinates
-        lat, lon = get_county_coordinates(county, state)
-        
-        return {
-            'region': f"{county.title()}, {state}",
-            'county': county,
-            'state': state,
-            'risk_score': float(predicted_risk),
-            'lat': lat,
-            'lon': lon
-        }
+        return _build_county_result(county, state, county_data, forecasted_value, idx)
         
     except Exception as e:
         logger.error(f"IBM Time Series Forecasting failed for {county}, {state}: {e}")
         return None
 
 
+def forecast_county_batch(
+    batch: List[Tuple[int, str, str, pd.DataFrame, pd.DataFrame]],
+    ts_model: TSModelInference,
+    min_points: int
+) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Forecast a batch of prepared counties with one multi-series request.
+    
+    The county series are stacked with county/state id columns so the model
+    forecasts all of them in a single round-trip. If the batched call fails,
+    the counties are retried individually on a small thread pool.
+    
+    Args:
+        batch: (idx, county, state, county_data, county_ts) tuples
+        ts_model: Time series model inference client
+        min_points: Required number of data points per series
+    
+    Returns:
+        (idx, result) pairs; result is None for counties that could not be forecast
+    """
+    payload = pd.concat(
+        [county_ts.assign(county=county, state=state) for _, county, state, _, county_ts in batch],
+        ignore_index=True
+    )
+    
+    try:
+        forecast_result = _forecast_with_retry(ts_model, payload, _BATCH_FORECAST_PARAMS)
+        forecasted_values = extract_batch_forecast_values(forecast_result)
+    except Exception as e:
+        logger.warning(f"Batched forecast for {len(batch)} counties failed ({e}); retrying counties individually.")
+        
+        def forecast_one(item):
+            idx, county, state, county_data, _ = item
+            return idx, forecast_single_county(county, state, county_data, ts_model, min_points, idx)
+        
+        # Per-county requests are network-bound, so keep several in flight
+        with ThreadPoolExecutor(max_workers=min(len(batch), FORECAST_FALLBACK_WORKERS)) as executor:
+            return list(executor.map(forecast_one, batch))
+    
+    results = []
+    for idx, county, state, county_data, _ in batch:
+        forecasted_value = forecasted_values.get((county, state))
+        if forecasted_value is None:
+            logger.error(f"Could not extract forecasted value for {county}, {state}.")
+            results.append((idx, None))
+            continue
+        results.append((idx, _build_county_result(county, state, county_data, forecasted_value, idx)))
+    return results
+
+
 def forecast_risk_by_county(data: pd.DataFrame, client: APIClient, forecast_horizon: int = 3) -> pd.DataFrame:
     """
     Forecasts risk for each county using IBM watsonx.ai Granite Time Series model.
@@ -186,7 +334,9 @@ def forecast_risk_by_county(data: pd.DataFrame, client: APIClient, forecast_hori
         forecast_horizon: Number of periods to forecast (default: 3)
     
     Returns:
-        DataFrame with county, state, predicted risk_score, lat, lon
+        DataFrame with county, state, predicted risk_score, lat, lon. Its
+        ``attrs['failed_counties']`` holds the number of counties with enough
+        data whose forecast request failed.
     """
     logger.info("Starting time series forecasting for each county using IBM Time Series Forecasting...")
     
@@ -211,31 +361,62 @@ def forecast_risk_by_county(data: pd.DataFrame, client: APIClient, forecast_hori
     
     logger.info(f"Using model {model_id} which requires at least {MIN_DATA_POINTS} data points per county")
     
-    # Process each county
-    counties = data[['county', 'state']].drop_duplicates()
-    total_counties = len(counties)
-    results = []
-    
-    for idx, (_, county_row) in enumerate(counties.iterrows()):
-        county = county_row['county']
-        state = county_row['state']
-        
-        county_data = data[(data['county'] == county) & (data['state'] == state)].copy()
-        if len(county_data) == 0:
+    # Sort once so every county's rows arrive in date order; the stable sort
+    # keeps same-date rows in their original order
+    data = data.sort_values(['county', 'state', 'date'], kind='stable', ignore_index=True)
+    
+    # One groupby pass splits the data instead of a full boolean scan per county
+    grouped = data.groupby(['county', 'state'], sort=False)
+    total_counties = grouped.ngroups
+    
+    # Prepare every county's series up front so they can be sent in batches
+    prepared = []
+    for idx, ((county, state), county_data) in enumerate(grouped):
+        county_ts = prepare_county_time_series(county_data, MIN_DATA_POINTS)
+        if county_ts is None:
+            if idx < 10 or (idx + 1) % 100 == 0:
+                logger.warning(f"Insufficient data for {county}, {state}. Skipping.")
             continue
         
-        result = forecast_single_county(county, state, county_data, ts_model, MIN_DATA_POINTS, idx)
-        if result:
-            results.append(result)
+        # Diagnostic logging for first few counties
+        if idx < 5:
+            logger.info(f"Processing {county}, {state}: {len(county_ts)} data points")
+        
+        prepared.append((idx, county, state, county_data, county_ts))
+    
+    # Send FORECAST_BATCH_SIZE counties per multi-series request, and keep
+    # several of these I/O-bound requests in flight at once
+    batches = [prepared[i:i + FORECAST_BATCH_SIZE] for i in range(0, len(prepared), FORECAST_BATCH_SIZE)]
+    results = [None] * total_counties
+    
+    with ThreadPoolExecutor(max_workers=FORECAST_MAX_WORKERS) as executor:
+        futures = [executor.submit(forecast_county_batch, batch, ts_model, MIN_DATA_POINTS) for batch in batches]
         
-        if (idx + 1) % 10 == 0:
-            logger.info(f"Processed {idx + 1}/{total_counties} counties...")
+        done = 0
+        for future in as_completed(futures):
+            batch_results = future.result()
+            for idx, result in batch_results:
+                results[idx] = result
+            done += len(batch_results)
+            logger.info(f"Processed {done}/{len(prepared)} counties...")
+    
+    # Keep the original county order regardless of completion order
+    results = [result for result in results if result]
     
     if len(results) == 0:
         error_msg = "No risk scores were generated. IBM Time Series Forecasting must be available and working."
         logger.error(error_msg)
         raise RuntimeError(error_msg)
     
+    # Counties that had enough data but got no forecast back (request errors
+    # or missing from the response); callers use this to avoid caching a
+    # partial result
+    failed_counties = len(prepared) - len(results)
+    if failed_counties:
+        logger.warning(f"{failed_counties} of {len(prepared)} counties could not be forecast.")
+    
     logger.info(f"Forecasting completed for {len(results)} counties using IBM Time Series Forecasting.")
-    return pd.DataFrame(results)
+    results = pd.DataFrame(results)
+    results.attrs['failed_counties'] = failed_counties
+    return results
 
@@ -4,6 +4,8 @@ Main orchestrator script that coordinates data preprocessing and forecasting.
 """
 
 import sys
+import glob
+import hashlib
 from pathlib import Path
 import os
 
@@ -14,54 +16,112 @@ if str(_repo_root) not in sys.path:
 
 import pandas as pd
 from typing import Optional
-from utils.data_processing import preprocess_data
+from utils.data_processing import load_preprocessed_data
+from utils.helpers import write_parquet_atomic
 from models.forecasting import forecast_risk_by_county
 from models.watsonx_ts_client import initialize_client
 from utils.logger import logger
 from utils.config import DATA_PATHS
+from models.constants import MIN_DATA_POINTS, FORECAST_FREQUENCY, RESULT_FLOAT32_COLUMNS
+
+# Forecast results cached under DATA_PATHS['cache'], one file per input hash
+FORECAST_CACHE_PATTERN = "forecast_*.parquet"
 
 
 def save_results(results: pd.DataFrame, output_dir: Optional[Path] = None) -> Path:
-    """Save forecast results to CSV file for heatmap visualization."""
+    """Save forecast results to a Parquet file for heatmap visualization."""
     if output_dir is None:
         output_dir = Path(DATA_PATHS.get('processed', os.path.abspath(os.path.join(Path(__file__).resolve().parents[1], 'data', 'processed'))))
     else:
         output_dir = Path(output_dir)
     
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / 'regional_risk.csv'
+    output_path = output_dir / 'regional_risk.parquet'
     
     logger.info(f"Saving forecast results to {output_path}...")
-    results.to_csv(output_path, index=False)
+    # Columnar binary output: no float formatting on write or parsing on read,
+    # and the dashboard gets the dtypes back as saved. Coordinates are stored
+    # as float32 (sub-metre precision, and the heatmap bins them anyway); scores
+    # stay float64 so the widened values don't serialize with float32 noise.
+    results = results.astype({column: 'float32' for column in RESULT_FLOAT32_COLUMNS if column in results})
+    results.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
     logger.info(f"Forecast results saved. Total counties: {len(results)}")
     return output_path
 
 
+def write_forecast_cache(results: pd.DataFrame, cache_path: Path) -> Path:
+    """Write forecast results to ``cache_path`` and drop forecasts cached for other inputs.
+    
+    Only the latest input can hit the cache, so older files are just disk use.
+    """
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet_atomic(results, cache_path, compression='zstd', index=False)
+    
+    for stale in glob.glob(str(cache_path.parent / FORECAST_CACHE_PATTERN)):
+        if Path(stale) != cache_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return cache_path
+
+
+def forecast_cache_path(data: pd.DataFrame, forecast_horizon: int, cache_dir: Optional[Path] = None) -> Path:
+    """Return the cache file for forecasts of ``data``, keyed by its content hash.
+    
+    The key also covers the forecasting settings, so changing them invalidates
+    earlier results rather than reusing them.
+    """
+    if cache_dir is None:
+        cache_dir = Path(DATA_PATHS.get('cache', os.path.abspath(os.path.join(Path(__file__).resolve().parents[1], 'data', 'processed', '.cache'))))
+    else:
+        cache_dir = Path(cache_dir)
+    
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(f"{MIN_DATA_POINTS}:{FORECAST_FREQUENCY}:{forecast_horizon}".encode())
+    
+    return cache_dir / FORECAST_CACHE_PATTERN.replace('*', digest.hexdigest()[:32])
+
+
 # Main execution
 if __name__ == "__main__":
     try:
-        print("Starting risk prediction pipeline...")
-        
-        print("Step 1: Preprocessing data from CSV files...")
-        data = preprocess_data()
-        print(f"  ✓ Loaded time series data for {data[['county', 'state']].drop_duplicates().shape[0]} counties")
+        logger.info("Starting risk prediction pipeline...")
         
-        print("Step 2: Initializing watsonx.ai client for IBM Time Series Forecasting...")
-        client = initialize_client()
-        print("  ✓ Client initialized")
+        logger.info("Step 1: Preprocessing data from CSV files...")
+        data = load_preprocessed_data()
+        county_count = data.groupby(['county', 'state'], sort=False).ngroups
+        logger.info(f"  ✓ Loaded time series data for {county_count} counties")
         
-        print("Step 3: Forecasting risk for each county using IBM Time Series Forecasting...")
-        forecast_results = forecast_risk_by_county(data, client, forecast_horizon=3)
-        print(f"  ✓ Forecasted risk for {len(forecast_results)} counties")
+        cache_path = forecast_cache_path(data, forecast_horizon=3)
+        if cache_path.exists():
+            # Inputs are unchanged since a previous run; skip the watsonx.ai calls
+            logger.info("Steps 2-3: Reusing cached forecast for unchanged input data...")
+            forecast_results = pd.read_parquet(cache_path)
+            logger.info(f"  ✓ Loaded cached forecast for {len(forecast_results)} counties from {cache_path}")
+        else:
+            logger.info("Step 2: Initializing watsonx.ai client for IBM Time Series Forecasting...")
+            client = initialize_client()
+            logger.info("  ✓ Client initialized")
+            
+            logger.info("Step 3: Forecasting risk for each county using IBM Time Series Forecasting...")
+            forecast_results = forecast_risk_by_county(data, client, forecast_horizon=3)
+            logger.info(f"  ✓ Forecasted risk for {len(forecast_results)} counties")
+            if forecast_results.attrs.get('failed_counties', 0) == 0:
+                write_forecast_cache(forecast_results, cache_path)
+            else:
+                # Don't cache a partial result, or the failed counties would
+                # never be retried while the input stays the same
+                logger.warning("  Some counties failed to forecast; not caching this result so the next run retries them.")
         
-        print("Step 4: Saving results...")
+        logger.info("Step 4: Saving results...")
         output_path = save_results(forecast_results)
-        print(f"  ✓ Results saved to {output_path}")
+        logger.info(f"  ✓ Results saved to {output_path}")
         
-        print("\nForecast completed successfully!")
-        print(f"Results are ready for heatmap visualization at: {output_path}")
+        logger.info("Forecast completed successfully!")
+        logger.info(f"Results are ready for heatmap visualization at: {output_path}")
         
     except Exception as e:
         logger.error(f"Error: {str(e)}", exc_info=True)
-        print(f"Error occurred: {str(e)}")
-        print("Check predictor.log for details.")
+        logger.info("Check predictor.log for details.")
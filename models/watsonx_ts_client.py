@@ -2,12 +2,15 @@
 IBM watsonx.ai Time Series client functions.
 """
 
+from functools import lru_cache
+import httpx
 import requests
 from typing import Optional
 from ibm_watsonx_ai import APIClient
+from ibm_watsonx_ai.utils.utils import HttpClientConfig
 from utils.config import API_KEY, PROJECT_ID, ENDPOINT, env_loaded
 from utils.logger import logger
-from models.constants import IAM_TOKEN_URL
+from models.constants import IAM_TOKEN_URL, FORECAST_MAX_WORKERS
 
 
 def log_credentials_status():
@@ -20,10 +23,8 @@ def log_credentials_status():
     if PROJECT_ID and API_KEY:
         source = ".env file" if env_loaded else "environment variables"
         logger.info(f"Credentials loaded from {source}: PROJECT_ID={'*' * min(len(str(PROJECT_ID)), 8)}..., API_KEY={'*' * min(len(str(API_KEY)), 8)}...")
-        print(f"✓ Credentials loaded from {source}")
     else:
         logger.warning("Credentials not found in .env file or environment variables")
-        print("⚠ Warning: API_KEY or PROJECT_ID not found in .env file or environment variables")
 
 
 def get_iam_token(api_key: str) -> str:
@@ -38,8 +39,13 @@ def get_iam_token(api_key: str) -> str:
     return response.json()["access_token"]
 
 
+@lru_cache(maxsize=1)
 def initialize_client() -> APIClient:
-    """Initialize IBM watsonx.ai client with credentials."""
+    """Initialize IBM watsonx.ai client with credentials.
+    
+    The client is built once per process and shared by later callers, since
+    construction authenticates against IBM Cloud. Failures are not cached.
+    """
     logger.info("Initializing watsonx.ai client...")
     
     api_key_loaded = API_KEY is not None and API_KEY != ""
@@ -57,7 +63,18 @@ def initialize_client() -> APIClient:
         'url': ENDPOINT
     }
     
-    client = APIClient(credentials=credentials, project_id=PROJECT_ID)
+    # Every TSModelInference built on this client shares its httpx connection
+    # pool. Size it to the forecast worker count so concurrent county requests
+    # reuse keep-alive connections instead of queueing for the SDK default of 10.
+    # The timeout is left to HttpClientConfig's default.
+    http_config = HttpClientConfig(
+        limits=httpx.Limits(
+            max_connections=FORECAST_MAX_WORKERS,
+            max_keepalive_connections=FORECAST_MAX_WORKERS
+        )
+    )
+    
+    client = APIClient(credentials=credentials, project_id=PROJECT_ID, httpx_client=http_config)
     logger.info("watsonx.ai client initialized successfully.")
     return client
 
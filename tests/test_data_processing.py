@@ -0,0 +1,57 @@
+"""
+Tests for the preprocessing pipeline in utils/data_processing.py.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing from utils and models
+_repo_root = Path(__file__).resolve().parents[1]
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from utils import data_processing
+from utils.data_processing import SOURCE_FILES, preprocess_data
+
+FEDERAL_CSV = """Year,State,County,Ownership,January Employment,February Employment,March Employment
+2025,Alabama,"Autauga County",Federal Government,100,94,96
+2025,Alabama,"Autauga County",Federal Government,100,94,96
+"""
+
+SNAP_CSV = """fips,county,state_name,snap_households,snap_household_rate
+01001,Autauga County,Alabama," 1,974 ", 8.76
+01001,Autauga County,Alabama," 1,974 ", 8.76
+"""
+
+UNEMPLOYMENT_CSV = """LAUS Code,State FIPS Code,County FIPS Code,County,State,Period,Unemploy-ment Rate (%)
+CN0100100000000,01,001,"Autauga County",AL,25-Jan,3
+CN0100100000000,01,001,"Autauga County",AL,25-Feb,3.1
+"""
+
+COST_CSV = """case_id,state,county,family_member_count,total_cost
+1,AL,Autauga County,1p0c,39254.0532
+1,AL,Autauga County,1p1c,57194.3256
+"""
+
+
+def test_preprocess_data_completes_with_duplicate_keys(tmp_path, monkeypatch):
+    """Duplicate SNAP counties and repeated federal (county, state, date) rows are joined, not rejected."""
+    contents = {
+        'federal': FEDERAL_CSV,
+        'snap': SNAP_CSV,
+        'unemployment': UNEMPLOYMENT_CSV,
+        'cost': COST_CSV
+    }
+    for name, text in contents.items():
+        (tmp_path / SOURCE_FILES[name]).write_text(text, encoding='utf-8')
+    monkeypatch.setitem(data_processing.DATA_PATHS, 'raw', str(tmp_path))
+
+    merged = preprocess_data()
+
+    # 2 unemployment months x 2 federal duplicates x 2 SNAP duplicates x 2 cost rows
+    assert len(merged) == 16
+    assert set(merged['county']) == {'Autauga'}
+    assert set(merged['state']) == {'AL'}
+    assert merged['federal_employment'].notna().all()
+    assert merged['snap_households'].eq(1974).all()
+    assert merged['risk_index'].notna().all()
@@ -15,7 +15,10 @@ import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (wrap in try/except to avoid
-# failing when .env contains bytes not decodable with utf-8)
+# failing when .env contains bytes not decodable with utf-8). These messages
+# are printed directly rather than logged: they run once at import, before any
+# logging from worker threads, and importing utils.logger here would make the
+# dashboard truncate predictor.log on startup.
 env_loaded = False
 try:
     env_loaded = load_dotenv()
@@ -41,7 +44,8 @@ MODEL_ID = os.getenv('MODEL_ID', 'granite-3-8b-instruct')
 DATA_PATHS = {
     "raw": os.path.join(os.getcwd(), 'data/datasets/'),
     "processed": os.path.join(os.getcwd(), 'data/processed/'),
-    "visuals": os.path.join(os.getcwd(), 'data/visuals/')
+    "visuals": os.path.join(os.getcwd(), 'data/visuals/'),
+    "cache": os.path.join(os.getcwd(), 'data/processed/.cache/')
 }
 
 def get_config():
@@ -2,21 +2,54 @@
 Data loading and preprocessing functions.
 """
 
+import glob
+import hashlib
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import sys
 import os
 # Add parent directory to path to allow importing from models
 _repo_root = Path(__file__).resolve().parents[1]
 if str(_repo_root) not in sys.path:
     sys.path.insert(0, str(_repo_root))
-from utils.helpers import read_csv_flexible, clean_numeric_column, normalize_county_name, parse_period_to_date
-from utils.geocode import normalize_state_name
+from utils.helpers import (
+    read_csv_flexible, clean_numeric_column, normalize_county_names, normalize_state_names,
+    parse_periods_to_dates, fips_to_state_codes, write_parquet_atomic
+)
 from utils.config import DATA_PATHS
 from utils.logger import logger
-from models.constants import FIPS_TO_STATE, RISK_WEIGHTS, POPULATION_ESTIMATE_MULTIPLIER
+from models.constants import RISK_WEIGHTS, POPULATION_ESTIMATE_MULTIPLIER
+
+# Source datasets under DATA_PATHS['raw']
+SOURCE_FILES = {
+    'federal': "federalEmploymentByCounty.csv",
+    'snap': "snapParticipationByCounty.csv",
+    'unemployment': "unemploymentByCounty.csv",
+    'cost': "costOfLivingByCounty.csv"
+}
+
+# Preprocessed output kept under DATA_PATHS['cache'] between runs. The file
+# name carries a signature of the settings the output depends on; bump the
+# version whenever a change to the processing code alters the output.
+PREPROCESSED_CACHE_VERSION = 1
+PREPROCESSED_CACHE_PATTERN = "preprocessed_*.parquet"
+
+# Columns read by each processing step below (including alternate spellings);
+# everything else in the source CSVs is skipped at parse time
+FEDERAL_COLUMNS = ['Year', 'State', 'County', 'January Employment', 'February Employment', 'March Employment']
+UNEMPLOYMENT_COLUMNS = ['State FIPS Code', 'County', 'Period', 'Unemploy-ment Rate (%)', 'Unemployment Rate (%)']
+SNAP_COLUMNS = ['county_name', 'county', 'state_name', 'state', 'snap_households', 'snap_household_count']
+COST_COLUMNS = ['county', 'state', 'total_cost']
+
+
+def _column(df: pd.DataFrame, names: List[str], default) -> pd.Series:
+    """Return the first of ``names`` present in ``df``, else a column filled with ``default``."""
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(default, index=df.index)
 
 
 def process_federal_employment(federal_df: pd.DataFrame) -> pd.DataFrame:
@@ -24,27 +57,31 @@ def process_federal_employment(federal_df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Processing Federal Employment data...")
     federal_df.columns = federal_df.columns.str.strip()
     
-    federal_processed = []
-    for _, row in federal_df.iterrows():
-        county = str(row.get('County', '')).strip()
-        state = str(row.get('State', '')).strip()
-        year = row.get('Year', 2025)
-        
-        jan_emp = clean_numeric_column(pd.Series([row.get('January Employment', 0)]))[0] or 0
-        feb_emp = clean_numeric_column(pd.Series([row.get('February Employment', 0)]))[0] or 0
-        mar_emp = clean_numeric_column(pd.Series([row.get('March Employment', 0)]))[0] or 0
-        
-        for month, emp in [('01', jan_emp), ('02', feb_emp), ('03', mar_emp)]:
-            federal_processed.append({
-                'county': normalize_county_name(county),
-                'state': normalize_state_name(state),
-                'year': year,
-                'month': month,
-                'date': pd.to_datetime(f"{year}-{month}-01", errors='coerce'),
-                'federal_employment': emp
-            })
-    
-    federal_ts = pd.DataFrame(federal_processed)
+    # Clean each month's employment column once, then melt the months into
+    # long form: one row per county per month, in the original row order
+    federal_wide = pd.DataFrame({
+        'county': normalize_county_names(_column(federal_df, ['County'], '').astype(str).str.strip()),
+        'state': normalize_state_names(_column(federal_df, ['State'], '').astype(str).str.strip()),
+        'year': _column(federal_df, ['Year'], 2025),
+        '01': clean_numeric_column(_column(federal_df, ['January Employment'], 0)),
+        '02': clean_numeric_column(_column(federal_df, ['February Employment'], 0)),
+        '03': clean_numeric_column(_column(federal_df, ['March Employment'], 0))
+    })
+    federal_ts = (
+        federal_wide
+        .melt(id_vars=['county', 'state', 'year'], var_name='month', value_name='federal_employment', ignore_index=False)
+        .sort_index(kind='stable')
+        .reset_index(drop=True)
+    )
+    federal_ts.insert(
+        4, 'date',
+        pd.to_datetime(federal_ts['year'].astype(str) + '-' + federal_ts['month'] + '-01', errors='coerce')
+    )
+    
+    # Narrow dtypes for the merges; employment counts are exact in float32
+    federal_ts['year'] = pd.to_numeric(federal_ts['year'], errors='coerce', downcast='integer')
+    federal_ts['month'] = federal_ts['month'].astype('category')
+    federal_ts['federal_employment'] = federal_ts['federal_employment'].astype(np.float32)
     return federal_ts.dropna(subset=['date', 'county', 'state'])
 
 
@@ -53,29 +90,23 @@ def process_unemployment(unemployment_df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Processing Unemployment data...")
     unemployment_df.columns = unemployment_df.columns.str.strip()
     
-    unemployment_processed = []
-    for _, row in unemployment_df.iterrows():
-        county_full = str(row.get('County', ''))
-        county = normalize_county_name(county_full)
-        state_fips = str(row.get('State FIPS Code', '')).zfill(2)
-        state_code = FIPS_TO_STATE.get(state_fips, state_fips)
-        period = str(row.get('Period', ''))
-        unemp_rate = clean_numeric_column(
-            pd.Series([row.get('Unemploy-ment Rate (%)', row.get('Unemployment Rate (%)', 0))])
-        )[0] or 0
-        
-        date = parse_period_to_date(period)
-        
-        if date and pd.notna(date) and county:
-            unemployment_processed.append({
-                'county': county,
-                'state': state_code,
-                'date': date,
-                'unemployment_rate': unemp_rate
-            })
-    
-    unemployment_ts = pd.DataFrame(unemployment_processed)
-    return unemployment_ts.dropna(subset=['date', 'county'])
+    # Map state FIPS codes to 2-letter codes with one array lookup
+    if 'State FIPS Code' in unemployment_df.columns:
+        state_codes = fips_to_state_codes(unemployment_df['State FIPS Code'])
+    else:
+        state_codes = pd.Series('00', index=unemployment_df.index)
+    
+    unemployment_ts = pd.DataFrame({
+        'county': normalize_county_names(_column(unemployment_df, ['County'], '').astype(str)),
+        'state': state_codes,
+        'date': parse_periods_to_dates(_column(unemployment_df, ['Period'], '').astype(str)),
+        'unemployment_rate': clean_numeric_column(
+            _column(unemployment_df, ['Unemploy-ment Rate (%)', 'Unemployment Rate (%)'], 0)
+        )
+    })
+    
+    valid = unemployment_ts['date'].notna() & unemployment_ts['county'].astype(bool)
+    return unemployment_ts[valid].reset_index(drop=True)
 
 
 def process_snap_data(snap_df: pd.DataFrame) -> pd.DataFrame:
@@ -83,23 +114,18 @@ def process_snap_data(snap_df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Processing SNAP data...")
     snap_df.columns = snap_df.columns.str.strip()
     
-    snap_processed = []
-    for _, row in snap_df.iterrows():
-        # tolerate different column names: 'county' or 'county_name', 'state' or 'state_name'
-        county_raw = row.get('county_name') if 'county_name' in row.index else row.get('county')
-        state_raw = row.get('state_name') if 'state_name' in row.index else row.get('state')
-        county = normalize_county_name(str(county_raw or ''))
-        state = normalize_state_name(str(state_raw or ''))
-        snap_households = clean_numeric_column(pd.Series([row.get('snap_households', row.get('snap_household_count', 0))]))[0] or 0
-        
-        if county and state:
-            snap_processed.append({
-                'county': county,
-                'state': state,
-                'snap_households': snap_households
-            })
-    
-    return pd.DataFrame(snap_processed)
+    # tolerate different column names: 'county' or 'county_name', 'state' or 'state_name'
+    snap_ts = pd.DataFrame({
+        'county': normalize_county_names(_column(snap_df, ['county_name', 'county'], '').astype(str)),
+        'state': normalize_state_names(_column(snap_df, ['state_name', 'state'], '').astype(str)),
+        # Household counts are exact in float32, which halves the column for the merges
+        'snap_households': clean_numeric_column(
+            _column(snap_df, ['snap_households', 'snap_household_count'], 0)
+        ).astype(np.float32)
+    })
+    
+    valid = snap_ts['county'].astype(bool) & snap_ts['state'].astype(bool)
+    return snap_ts[valid].reset_index(drop=True)
 
 
 def process_cost_data(cost_df: pd.DataFrame) -> pd.DataFrame:
@@ -107,20 +133,14 @@ def process_cost_data(cost_df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Processing Cost of Living data...")
     cost_df.columns = cost_df.columns.str.strip()
     
-    cost_processed = []
-    for _, row in cost_df.iterrows():
-        county = normalize_county_name(str(row.get('county', '')))
-        state = normalize_state_name(str(row.get('state', '')))
-        total_cost = clean_numeric_column(pd.Series([row.get('total_cost', 0)]))[0] or 0
-        
-        if county and state:
-            cost_processed.append({
-                'county': county,
-                'state': state,
-                'total_cost': total_cost
-            })
+    cost_ts = pd.DataFrame({
+        'county': normalize_county_names(_column(cost_df, ['county'], '').astype(str)),
+        'state': normalize_state_names(_column(cost_df, ['state'], '').astype(str)),
+        'total_cost': clean_numeric_column(_column(cost_df, ['total_cost'], 0))
+    })
     
-    return pd.DataFrame(cost_processed)
+    valid = cost_ts['county'].astype(bool) & cost_ts['state'].astype(bool)
+    return cost_ts[valid].reset_index(drop=True)
 
 
 def calculate_risk_index(merged_ts: pd.DataFrame) -> pd.DataFrame:
@@ -128,14 +148,15 @@ def calculate_risk_index(merged_ts: pd.DataFrame) -> pd.DataFrame:
     logger.info("Calculating risk index...")
     
     # Fill missing values with safe defaults
-    merged_ts['federal_employment'] = merged_ts['federal_employment'].fillna(0)
+    # Counts arrive as float32 from the merges; widen them for the arithmetic below
+    merged_ts['federal_employment'] = merged_ts['federal_employment'].astype(np.float64).fillna(0)
     
     unemp_median = merged_ts['unemployment_rate'].median()
     if pd.isna(unemp_median):
         unemp_median = 0
     merged_ts['unemployment_rate'] = merged_ts['unemployment_rate'].fillna(unemp_median)
     
-    merged_ts['snap_households'] = merged_ts['snap_households'].fillna(0)
+    merged_ts['snap_households'] = merged_ts['snap_households'].astype(np.float64).fillna(0)
     
     cost_median = merged_ts['total_cost'].median()
     if pd.isna(cost_median):
@@ -158,24 +179,32 @@ def calculate_risk_index(merged_ts: pd.DataFrame) -> pd.DataFrame:
     if cost_range == 0 or pd.isna(cost_range):
         merged_ts['cost_index_norm'] = 0.0
     else:
-        merged_ts['cost_index_norm'] = (merged_ts['total_cost'] - cost_min) / cost_range
-    
-    # Ensure all intermediate values are finite
-    merged_ts['employment_ratio'] = merged_ts['employment_ratio'].replace([np.inf, -np.inf], 0).fillna(0)
-    merged_ts['snap_rate'] = merged_ts['snap_rate'].replace([np.inf, -np.inf], 0).fillna(0)
-    merged_ts['unemployment_rate_norm'] = merged_ts['unemployment_rate_norm'].replace([np.inf, -np.inf], 0).fillna(0)
-    merged_ts['cost_index_norm'] = merged_ts['cost_index_norm'].replace([np.inf, -np.inf], 0).fillna(0)
-    
-    # Composite risk index
-    merged_ts['risk_index'] = (
-        RISK_WEIGHTS['employment_ratio'] * merged_ts['employment_ratio'] +
-        RISK_WEIGHTS['unemployment_rate'] * merged_ts['unemployment_rate_norm'] +
-        RISK_WEIGHTS['snap_rate'] * merged_ts['snap_rate'] +
-        RISK_WEIGHTS['cost_index'] * merged_ts['cost_index_norm']
-    )
+        # Shift and scale one buffer in place rather than allocating a Series per step
+        cost_norm = merged_ts['total_cost'].to_numpy(dtype=np.float64, copy=True)
+        cost_norm -= cost_min
+        cost_norm /= cost_range
+        merged_ts['cost_index_norm'] = cost_norm
+    
+    # Stack the features, then make them finite with one in-place pass over
+    # the stacked array rather than a replace/fillna pair per column
+    feature_weights = [
+        ('employment_ratio', RISK_WEIGHTS['employment_ratio']),
+        ('unemployment_rate_norm', RISK_WEIGHTS['unemployment_rate']),
+        ('snap_rate', RISK_WEIGHTS['snap_rate']),
+        ('cost_index_norm', RISK_WEIGHTS['cost_index'])
+    ]
+    features = merged_ts[[column for column, _ in feature_weights]].to_numpy(dtype=np.float64)
+    np.nan_to_num(features, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    for i, (column, _) in enumerate(feature_weights):
+        merged_ts[column] = features[:, i]
+    
+    # Composite risk index as one matrix-vector product over the stacked
+    # features instead of a separate weighted pass per column
+    weights = np.array([weight for _, weight in feature_weights], dtype=np.float64)
+    risk_index = features @ weights
     
     # Final safety check
-    merged_ts['risk_index'] = merged_ts['risk_index'].replace([np.inf, -np.inf], 0).fillna(0)
+    merged_ts['risk_index'] = np.nan_to_num(risk_index, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
     
     # Log statistics
     risk_nan_count = merged_ts['risk_index'].isna().sum()
@@ -187,6 +216,27 @@ def calculate_risk_index(merged_ts: pd.DataFrame) -> pd.DataFrame:
     return merged_ts
 
 
+def _county_key_codes(*frames: pd.DataFrame) -> List[np.ndarray]:
+    """
+    Encode (county, state) pairs as shared integer keys across several frames.
+    
+    Each column is factorized once over all frames, so later joins hash
+    integers instead of re-hashing the strings on every merge.
+    """
+    keys = pd.concat([frame[['county', 'state']] for frame in frames], ignore_index=True)
+    county_codes, _ = pd.factorize(keys['county'])
+    state_codes, state_uniques = pd.factorize(keys['state'])
+    codes = county_codes.astype(np.int64) * (len(state_uniques) + 1) + state_codes
+    
+    bounds = np.cumsum([0] + [len(frame) for frame in frames])
+    return [codes[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _raw_data_dir() -> Path:
+    """Return the configured raw data directory (moved datasets are under data/datasets/)."""
+    return Path(DATA_PATHS.get('raw', os.path.abspath(os.path.join(Path(__file__).resolve().parents[1], 'data'))))
+
+
 def preprocess_data() -> pd.DataFrame:
     """
     Load and merge all datasets to compute a composite socioeconomic index per county.
@@ -194,15 +244,14 @@ def preprocess_data() -> pd.DataFrame:
     """
     logger.info("Starting data preprocessing...")
 
-    # Use configured raw data directory (moved datasets are under data/datasets/)
-    data_dir = Path(DATA_PATHS.get('raw', os.path.abspath(os.path.join(Path(__file__).resolve().parents[1], 'data'))))
+    data_dir = _raw_data_dir()
 
     # Load CSV files
     logger.info("Loading CSV files...")
-    federal_df = read_csv_flexible(data_dir / "federalEmploymentByCounty.csv")
-    snap_df = read_csv_flexible(data_dir / "snapParticipationByCounty.csv")
-    unemployment_df = read_csv_flexible(data_dir / "unemploymentByCounty.csv")
-    cost_df = read_csv_flexible(data_dir / "costOfLivingByCounty.csv")
+    federal_df = read_csv_flexible(data_dir / SOURCE_FILES['federal'], usecols=FEDERAL_COLUMNS)
+    snap_df = read_csv_flexible(data_dir / SOURCE_FILES['snap'], usecols=SNAP_COLUMNS)
+    unemployment_df = read_csv_flexible(data_dir / SOURCE_FILES['unemployment'], usecols=UNEMPLOYMENT_COLUMNS)
+    cost_df = read_csv_flexible(data_dir / SOURCE_FILES['cost'], usecols=COST_COLUMNS)
 
     logger.info(f"Loaded {len(federal_df)} federal employment records")
     logger.info(f"Loaded {len(snap_df)} SNAP records")
@@ -217,25 +266,36 @@ def preprocess_data() -> pd.DataFrame:
 
     # Merge time series data
     logger.info("Merging time series data...")
-    merged_ts = unemployment_ts.copy()
+    unemployment_keys, federal_keys, snap_keys, cost_keys = _county_key_codes(
+        unemployment_ts, federal_ts, snap_latest, cost_latest
+    )
     
-    merged_ts = merged_ts.merge(
-        federal_ts[['county', 'state', 'date', 'federal_employment']],
-        on=['county', 'state', 'date'],
-        how='left'
+    # SNAP and cost of living are both keyed by county alone, so combine those
+    # small tables first and join them onto the time series in one pass
+    county_lookup = pd.DataFrame({
+        'key_id': snap_keys,
+        'snap_households': snap_latest['snap_households'].to_numpy()
+    }).merge(
+        pd.DataFrame({'key_id': cost_keys, 'total_cost': cost_latest['total_cost'].to_numpy()}),
+        on='key_id',
+        how='outer'
     )
     
-    merged_ts = merged_ts.merge(
-        snap_latest[['county', 'state', 'snap_households']],
-        on=['county', 'state'],
+    merged_ts = unemployment_ts.assign(key_id=unemployment_keys).merge(
+        pd.DataFrame({
+            'key_id': federal_keys,
+            'date': federal_ts['date'].to_numpy(),
+            'federal_employment': federal_ts['federal_employment'].to_numpy()
+        }),
+        on=['key_id', 'date'],
         how='left'
     )
     
     merged_ts = merged_ts.merge(
-        cost_latest[['county', 'state', 'total_cost']],
-        on=['county', 'state'],
+        county_lookup,
+        on='key_id',
         how='left'
-    )
+    ).drop(columns='key_id')
 
     # Calculate risk index
     merged_ts = calculate_risk_index(merged_ts)
@@ -243,6 +303,44 @@ def preprocess_data() -> pd.DataFrame:
     # Sort by date and county
     merged_ts = merged_ts.sort_values(['county', 'state', 'date']).reset_index(drop=True)
     
-    logger.info(f"Preprocessed {len(merged_ts)} time series records for {merged_ts[['county', 'state']].drop_duplicates().shape[0]} counties")
+    county_count = merged_ts.groupby(['county', 'state'], sort=False).ngroups
+    logger.info(f"Preprocessed {len(merged_ts)} time series records for {county_count} counties")
     return merged_ts
 
+
+def _preprocessed_cache_name() -> str:
+    """Return the cache file name for the current risk settings and cache version."""
+    signature = repr((PREPROCESSED_CACHE_VERSION, sorted(RISK_WEIGHTS.items()), POPULATION_ESTIMATE_MULTIPLIER))
+    digest = hashlib.blake2b(signature.encode(), digest_size=8).hexdigest()
+    return PREPROCESSED_CACHE_PATTERN.replace('*', digest)
+
+
+def load_preprocessed_data() -> pd.DataFrame:
+    """
+    Return the preprocessed data, reusing the Parquet copy written by an earlier
+    run when it is newer than every source CSV and was built with the current
+    risk weights, population multiplier and cache version. Otherwise preprocess
+    from scratch and refresh the copy.
+    """
+    data_dir = _raw_data_dir()
+    cache_dir = Path(DATA_PATHS.get('cache', os.path.abspath(os.path.join(Path(__file__).resolve().parents[1], 'data', 'processed', '.cache'))))
+    cache_path = cache_dir / _preprocessed_cache_name()
+    
+    sources = [data_dir / name for name in SOURCE_FILES.values()]
+    if cache_path.exists() and all(source.exists() for source in sources):
+        if cache_path.stat().st_mtime > max(source.stat().st_mtime for source in sources):
+            logger.info(f"Source data unchanged; loading preprocessed data from {cache_path}")
+            return pd.read_parquet(cache_path)
+    
+    merged_ts = preprocess_data()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    write_parquet_atomic(merged_ts, cache_path, compression='zstd', index=False)
+    
+    # Drop copies built with other settings; they can no longer be hit
+    for stale in glob.glob(str(cache_dir / PREPROCESSED_CACHE_PATTERN)):
+        if Path(stale) != cache_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return merged_ts
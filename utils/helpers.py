@@ -2,30 +2,77 @@
 Helper functions for data processing utilities.
 """
 
+import codecs
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 import re
+from models.constants import FIPS_TO_STATE_ARR
+from utils.geocode import normalize_state_name
 
+# Bytes read from the start of a CSV to guess its encoding
+ENCODING_SNIFF_BYTES = 64 * 1024
 
-def read_csv_flexible(file_path: Path) -> pd.DataFrame:
+# Month abbreviation -> month number, for period strings like "24-Jul"
+MONTH_ABBREVIATIONS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+
+def _is_utf8(file_path: Path) -> bool:
+    """Check whether the first ENCODING_SNIFF_BYTES bytes of a file decode as UTF-8."""
+    with open(file_path, 'rb') as fh:
+        head = fh.read(ENCODING_SNIFF_BYTES)
+    try:
+        # Incremental decode so a multi-byte character cut at the boundary isn't an error
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def read_csv_flexible(file_path: Path, usecols: Optional[Iterable[str]] = None) -> pd.DataFrame:
     """
     Read CSV file with flexible encoding handling.
-    Tries multiple encodings to handle various file formats.
+    Tries multiple encodings to handle various file formats, skipping UTF-8
+    when a sniff of the file's head shows it isn't UTF-8.
     
     Args:
         file_path: Path to the CSV file
+        usecols: Optional column names to keep (matched after stripping
+            whitespace); names missing from the file are ignored
         
     Returns:
         DataFrame containing the CSV data
     """
+    wanted = None if usecols is None else set(usecols)
+    keep = None if wanted is None else (lambda column: column.strip() in wanted)
+    
     encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+    # Skip the full UTF-8 parse attempt when the file's head already rules it out
+    if not _is_utf8(file_path):
+        encodings.remove('utf-8')
     
     for encoding in encodings:
         try:
-            # Try the fast C engine first
-            df = pd.read_csv(file_path, encoding=encoding, low_memory=False)
+            # Try pyarrow's multithreaded reader first; it needs an explicit
+            # column list, so resolve the wanted names against the header
+            columns = None
+            if keep is not None:
+                header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+                columns = [column for column in header if keep(column)]
+            return pd.read_csv(file_path, encoding=encoding, engine='pyarrow', usecols=columns)
+        except Exception:
+            # fall back to pandas' own parsers below
+            pass
+        
+        try:
+            # Then the C engine
+            df = pd.read_csv(file_path, encoding=encoding, low_memory=False, usecols=keep)
             return df
         except (UnicodeDecodeError, UnicodeError):
             # encoding issue - try next encoding
@@ -33,7 +80,7 @@ def read_csv_flexible(file_path: Path) -> pd.DataFrame:
         except pd.errors.ParserError:
             # Fallback: try the python engine and skip bad lines to tolerate malformed rows
             try:
-                df = pd.read_csv(file_path, encoding=encoding, engine='python', on_bad_lines='skip')
+                df = pd.read_csv(file_path, encoding=encoding, engine='python', on_bad_lines='skip', usecols=keep)
                 return df
             except Exception:
                 continue
@@ -43,11 +90,11 @@ def read_csv_flexible(file_path: Path) -> pd.DataFrame:
         # Open the file with replacement for invalid bytes and let pandas read from the file object.
         # This avoids passing the 'errors' parameter directly to pandas.read_csv which some type stubs don't accept.
         with open(file_path, 'r', encoding='utf-8', errors='replace') as fh:
-            return pd.read_csv(fh, low_memory=False)
+            return pd.read_csv(fh, low_memory=False, usecols=keep)
     except Exception:
         # Final fallback: python engine and skip bad lines, also using a file handle with errors replaced
         with open(file_path, 'r', encoding='utf-8', errors='replace') as fh:
-            return pd.read_csv(fh, engine='python', on_bad_lines='skip')
+            return pd.read_csv(fh, engine='python', on_bad_lines='skip', usecols=keep)
 
 
 def clean_numeric_column(series: pd.Series) -> pd.Series:
@@ -61,11 +108,9 @@ def clean_numeric_column(series: pd.Series) -> pd.Series:
         Series with cleaned numeric values (NaN for non-numeric values)
     """
     if series.dtype == 'object':
-        # Remove commas and other non-numeric characters except decimal points and minus signs
-        cleaned = series.astype(str).str.replace(',', '', regex=False)
-        cleaned = cleaned.str.strip()
-        # Replace empty strings with NaN
-        cleaned = cleaned.replace(['', 'nan', 'None', 'null'], np.nan)
+        # Remove thousands separators and surrounding whitespace. Empty strings
+        # and 'nan'/'None'/'null' are left for to_numeric to coerce to NaN.
+        cleaned = series.astype(str).str.replace(',', '', regex=False).str.strip()
     else:
         cleaned = series
     
@@ -73,6 +118,25 @@ def clean_numeric_column(series: pd.Series) -> pd.Series:
     return pd.to_numeric(cleaned, errors='coerce')
 
 
+def fips_to_state_codes(fips_codes: pd.Series) -> pd.Series:
+    """
+    Convert a column of state FIPS codes to 2-letter state codes in one vectorized lookup.
+    
+    Args:
+        fips_codes: Series of state FIPS codes (ints or zero-padded strings)
+        
+    Returns:
+        Series of 2-letter state codes; codes without a state (e.g. 72, Puerto Rico)
+        keep their zero-padded FIPS string
+    """
+    codes = pd.to_numeric(fips_codes, errors='coerce')
+    in_range = codes.between(0, len(FIPS_TO_STATE_ARR) - 1).to_numpy()
+    states = FIPS_TO_STATE_ARR[codes.where(in_range, 0).to_numpy(dtype=np.int64)]
+    known = in_range & (states != '')
+    fallback = fips_codes.astype(str).str.zfill(2).to_numpy()
+    return pd.Series(np.where(known, states, fallback).astype(object), index=fips_codes.index)
+
+
 def normalize_county_name(county_name: str) -> Optional[str]:
     """
     Normalize county name by removing common suffixes and standardizing format.
@@ -103,6 +167,45 @@ def normalize_county_name(county_name: str) -> Optional[str]:
     return county_str if county_str else None
 
 
+def _map_distinct(values: pd.Series, func) -> pd.Series:
+    """
+    Apply a scalar ``func`` to a column, once per distinct value.
+    
+    Name and period columns repeat few distinct values across many rows, so
+    only the distinct values are converted and the results are broadcast back
+    by code. Missing values map to None.
+    """
+    codes, uniques = pd.factorize(values)
+    converted = np.array([func(value) for value in uniques] + [None], dtype=object)
+    return pd.Series(converted[codes], index=values.index)
+
+
+def normalize_county_names(county_names: pd.Series) -> pd.Series:
+    """
+    Normalize a column of county names (see ``normalize_county_name``).
+    
+    Args:
+        county_names: Series of raw county name strings
+        
+    Returns:
+        Series of normalized county names, None where invalid
+    """
+    return _map_distinct(county_names, normalize_county_name)
+
+
+def normalize_state_names(state_names: pd.Series) -> pd.Series:
+    """
+    Normalize a column of state names to 2-letter codes (see ``normalize_state_name``).
+    
+    Args:
+        state_names: Series of full state names or 2-letter codes
+        
+    Returns:
+        Series of 2-letter state codes (unknown names are returned upper-cased)
+    """
+    return _map_distinct(state_names, normalize_state_name)
+
+
 def parse_period_to_date(period: str) -> Optional[pd.Timestamp]:
     """
     Parse period string to pandas Timestamp.
@@ -134,11 +237,7 @@ def parse_period_to_date(period: str) -> Optional[pd.Timestamp]:
                 year = int(year_str)
             
             # Convert month abbreviation to number
-            month_map = {
-                'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-                'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-            }
-            month = month_map.get(month_str.lower())
+            month = MONTH_ABBREVIATIONS.get(month_str.lower())
             
             if month:
                 return pd.Timestamp(year=year, month=month, day=1)
@@ -163,11 +262,7 @@ def parse_period_to_date(period: str) -> Optional[pd.Timestamp]:
             month_str = match.group(1)
             year_str = match.group(2)
             
-            month_map = {
-                'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-                'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-            }
-            month = month_map.get(month_str.lower())
+            month = MONTH_ABBREVIATIONS.get(month_str.lower())
             
             if len(year_str) == 2:
                 year = 2000 + int(year_str)
@@ -189,3 +284,43 @@ def parse_period_to_date(period: str) -> Optional[pd.Timestamp]:
     except (ValueError, TypeError):
         return None
 
+
+def parse_periods_to_dates(periods: pd.Series) -> pd.Series:
+    """
+    Parse a column of period strings to Timestamps (see ``parse_period_to_date``).
+    
+    Args:
+        periods: Series of period strings in the formats ``parse_period_to_date`` accepts
+        
+    Returns:
+        datetime64 Series, NaT where a period could not be parsed
+    """
+    return pd.to_datetime(_map_distinct(periods, parse_period_to_date))
+
+
+def write_parquet_atomic(df: pd.DataFrame, path: Path, **kwargs) -> Path:
+    """
+    Write ``df`` to ``path`` as Parquet without ever exposing a partial file.
+    
+    The frame is written to a temp file in the same directory and moved into
+    place with ``os.replace``, so an interrupted write leaves the previous file
+    (or none) rather than a truncated one that later reads fail on.
+    
+    Args:
+        df: DataFrame to write
+        path: Destination file
+        **kwargs: Passed through to ``DataFrame.to_parquet``
+        
+    Returns:
+        The destination path
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
@@ -3,7 +3,10 @@ Centralized logging configuration for the application.
 Provides a configured logger instance that can be imported across modules.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 
@@ -44,13 +47,22 @@ def setup_logger(name='predictor', log_file='predictor.log', level=logging.INFO,
     file_handler = logging.FileHandler(log_file, mode=filemode, encoding='utf-8')
     file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
     
     # Console handler - also log to console
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    
+    # Callers only enqueue records; a background listener does the file and
+    # console I/O, so logging from worker threads never blocks on a write
+    log_queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Drain anything still queued before the interpreter exits
+    atexit.register(listener.stop)
     
     return logger
 